@@ -0,0 +1,21 @@
+# Gunicorn settings for running the portal under a process manager:
+#   gunicorn -c gunicorn_conf.py multi_agent_system:app
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# UvicornWorker uses uvloop and httptools when they are installed
+worker_class = "uvicorn_worker.UvicornWorker"
+# Same variable multi_agent_system reads, so the ticket change watcher
+# starts whenever there is more than one worker
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_connections = 1000
+# The app opens its SQLite connection and thread pools at import time, and
+# neither survives a fork, so every worker imports the app itself. Workers
+# starting together may all run the legacy JSON ticket import; it is an
+# idempotent upsert and waits on SQLite's busy timeout
+preload_app = False
+# LLM calls can take a while; don't let the arbiter kill a busy worker
+timeout = 120
+graceful_timeout = 30
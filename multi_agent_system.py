@@ -1,29 +1,183 @@
 import os
-import json
-import base64
-import requests
-from typing import Dict, Any, List, Optional
+import gzip
+import hashlib
+import httpx
+from typing import Dict, Any, List, Optional, Set, Tuple, Union, BinaryIO
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Body, File, UploadFile, Form, Request
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response
 from fastapi.responses import JSONResponse
-from fastapi.responses import HTMLResponse
+from fastapi.responses import StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, TypeAdapter
 import uvicorn
 import asyncio
 import io
 import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import ahocorasick
+import orjson
+import pybase64
+import xxhash
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Optional
 
 load_dotenv()
 hf_api_key = os.getenv("API_KEY")
 
+# Chat completion endpoint shared by the vision and text agents. The API
+# key doesn't change at runtime, so the headers are built once for both
+LLM_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
+LLM_HEADERS = {
+    "Authorization": f"Bearer {hf_api_key}",
+    "Content-Type": "application/json",
+    "HTTP-Referer": "https://your-site.com",
+    "X-Title": "ITSM & Operations Automation Portal"
+}
+
+# Number of uvicorn worker processes; they share the SQLite ticket store
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Bound once so the hot ticket paths skip the attribute lookup
+_loads = orjson.loads
+_dumps = orjson.dumps
+
+# Shared HTTP/2 client so LLM calls reuse keep-alive connections and never
+# block the event loop
+HTTP_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=60,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+
+# Upstream LLM calls: at most LLM_CONCURRENCY in flight, and identical
+# request bodies within LLM_CACHE_TTL seconds share a single call. A call
+# that can't get a slot within LLM_QUEUE_TIMEOUT seconds fails instead of
+# queueing behind an overloaded upstream
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "20"))
+LLM_QUEUE_TIMEOUT = 30
+LLM_CACHE_TTL = 30
+# Made on the running loop, by the lifespan or on first use: before Python
+# 3.10 a semaphore built at import binds to a different loop than uvicorn's
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+_llm_cache: TTLCache = TTLCache(maxsize=256, ttl=LLM_CACHE_TTL)
+_llm_in_flight: Dict[bytes, asyncio.Task] = {}
+
+# Vision requests carry whole images; only VISION_CONCURRENCY are handled
+# at once, and their base64 encoding runs on a small pool instead of the
+# event loop
+VISION_CONCURRENCY = 2
+# Made on the running loop, like _llm_semaphore
+_vision_semaphore: Optional[asyncio.Semaphore] = None
+_vision_pool = ThreadPoolExecutor(max_workers=VISION_CONCURRENCY, thread_name_prefix="vision")
+# Recently encoded images by content hash, bounded by total data URI size,
+# so asking a new question about the same image skips re-encoding it
+VISION_CACHE_BYTES = 64 * 1024 * 1024
+# Largest accepted upload; anything bigger is refused before it's encoded
+VISION_MAX_BYTES = 10 * 1024 * 1024
+# Room in a /vision request body for the prompt field and multipart framing
+VISION_FORM_OVERHEAD = 64 * 1024
+
+# Per-client limits on the model-backed routes, as requests per
+# RATE_LIMIT_WINDOW seconds. Counts are per worker process, in fixed
+# windows that expire on their own
+RATE_LIMIT_WINDOW = 60
+TEXT_RATE_LIMIT = 10
+VISION_RATE_LIMIT = 2
+_rate_counts: TTLCache = TTLCache(maxsize=10000, ttl=RATE_LIMIT_WINDOW)
+
+
+def check_rate_limit(scope: str, client_ip: str, limit: int) -> None:
+    """Count a request from client_ip against scope, raising 429 once limit is reached"""
+    window = int(time.time() // RATE_LIMIT_WINDOW)
+    key = (scope, client_ip, window)
+    count = _rate_counts.get(key, 0)
+    if count >= limit:
+        retry_after = (window + 1) * RATE_LIMIT_WINDOW - int(time.time())
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please try again shortly",
+            headers={"Retry-After": str(max(retry_after, 1))}
+        )
+    _rate_counts[key] = count + 1
+
+
+def vision_semaphore() -> asyncio.Semaphore:
+    """Semaphore bounding vision requests in progress, created inside the running loop"""
+    global _vision_semaphore
+    if _vision_semaphore is None:
+        _vision_semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
+    return _vision_semaphore
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    """Semaphore bounding upstream LLM calls, created inside the running loop"""
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _llm_semaphore
+
+
+async def _post_chat_completion(endpoint: str, headers: Dict[str, str], body: bytes, key: bytes) -> str:
+    """Perform the upstream request and cache its result"""
+    semaphore = llm_semaphore()
+    await asyncio.wait_for(semaphore.acquire(), LLM_QUEUE_TIMEOUT)
+    try:
+        response = await HTTP_CLIENT.post(endpoint, headers=headers, content=body)
+    finally:
+        semaphore.release()
+    response.raise_for_status()
+    result = _loads(response.content)["choices"][0]["message"]["content"]
+    _llm_cache[key] = result
+    return result
+
+
+async def chat_completion(endpoint: str, headers: Dict[str, str], payload: Dict[str, Any],
+                          key_source: Optional[bytes] = None) -> str:
+    """Send a chat completion request and return the message content"""
+    # Serialized once with orjson; unless the caller supplies its own key
+    # source, the bytes double as the cache key source
+    body = _dumps(payload)
+    return await send_chat_body(endpoint, headers, body, key_source or body)
+
+
+async def send_chat_body(endpoint: str, headers: Dict[str, str], body: bytes, key_source: bytes) -> str:
+    """Send an already serialized chat completion request, cached on key_source"""
+    key = hashlib.blake2b(key_source, digest_size=16).digest()
+
+    cached = _llm_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Join an identical request that is already on its way upstream
+    task = _llm_in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_post_chat_completion(endpoint, headers, body, key))
+        _llm_in_flight[key] = task
+        task.add_done_callback(lambda _: _llm_in_flight.pop(key, None))
+
+    return await asyncio.shield(task)
+
+
+# Largest ticket page a single response will build, for lists and searches
+MAX_PAGE_SIZE = 100
+# Joins created_at and ticket_id in a /tickets/list cursor; it never
+# appears in an ISO timestamp
+CURSOR_SEPARATOR = "|"
+
 
 # Define models
 class Ticket(BaseModel):
-    ticket_id: str = None
+    # Timestamp-based IDs collided for tickets created within the same second
+    ticket_id: str = Field(default_factory=lambda: f"ticket_{uuid.uuid4().hex}")
     issue: str
     category: str = "incident"
     priority: str = "P3"
@@ -32,124 +186,310 @@ class Ticket(BaseModel):
     time: str
     ip: str
     auto_generated: bool = False
-    created_at: str = None
-
-    def __init__(self, **data):
-        super().__init__(**data)
-        if not self.ticket_id:
-            self.ticket_id = f"ticket_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        if not self.created_at:
-            self.created_at = datetime.now().isoformat()
-
-    def dict(self):
-        return {
-            "ticket_id": self.ticket_id,
-            "issue": self.issue,
-            "category": self.category,
-            "priority": self.priority,
-            "assigned_team": self.assigned_team,
-            "status": self.status,
-            "time": self.time,
-            "ip": self.ip,
-            "auto_generated": self.auto_generated,
-            "created_at": self.created_at
-        }
+    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+
+# Serializes ticket lists straight to JSON bytes in pydantic-core
+TICKET_LIST_ADAPTER = TypeAdapter(List[Ticket])
 
 
 class TicketManager:
     """Manages persistent storage and retrieval of tickets"""
 
+    COLUMNS = ("ticket_id", "issue", "category", "priority", "assigned_team",
+               "status", "time", "ip", "auto_generated", "created_at")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            ticket_id TEXT PRIMARY KEY,
+            issue TEXT NOT NULL,
+            category TEXT,
+            priority TEXT,
+            assigned_team TEXT,
+            status TEXT,
+            time TEXT,
+            ip TEXT,
+            auto_generated INTEGER,
+            created_at TEXT
+        );
+        -- ticket_id breaks ties between tickets created at the same instant
+        DROP INDEX IF EXISTS idx_tickets_created;
+        CREATE INDEX IF NOT EXISTS idx_tickets_created_id ON tickets(created_at DESC, ticket_id DESC);
+        -- A single counter bumped by every change to the tickets table, from
+        -- any worker; ticket views are versioned by it
+        CREATE TABLE IF NOT EXISTS ticket_changes (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO ticket_changes (id, version) VALUES (0, 0);
+        CREATE TRIGGER IF NOT EXISTS tickets_version_ai AFTER INSERT ON tickets BEGIN
+            UPDATE ticket_changes SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tickets_version_ad AFTER DELETE ON tickets BEGIN
+            UPDATE ticket_changes SET version = version + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS tickets_version_au AFTER UPDATE ON tickets BEGIN
+            UPDATE ticket_changes SET version = version + 1;
+        END;
+    """
+
+    # Full-text index over the searchable columns, kept in sync by triggers.
+    # The trigram tokenizer gives the same substring semantics as the old
+    # scan while letting SQLite answer from the index.
+    SEARCH_COLUMNS = ("ticket_id", "issue", "category", "priority", "assigned_team", "status", "ip")
+
+    FTS_SCHEMA = f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+            {", ".join(SEARCH_COLUMNS)},
+            content='tickets', content_rowid='rowid', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS tickets_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO tickets_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+        END;
+        CREATE TRIGGER IF NOT EXISTS tickets_ad AFTER DELETE ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+        END;
+        CREATE TRIGGER IF NOT EXISTS tickets_au AFTER UPDATE ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+            INSERT INTO tickets_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+        END;
+    """
+
+    # Statements are kept as constants so sqlite3's per-connection
+    # statement cache reuses the prepared form on every call
+    # An upsert rather than INSERT OR REPLACE, so the update trigger keeps
+    # the full-text index in sync
+    INSERT_SQL = (
+        "INSERT INTO tickets (" + ", ".join(COLUMNS) + ") "
+        "VALUES (" + ", ".join("?" * len(COLUMNS)) + ") "
+        "ON CONFLICT(ticket_id) DO UPDATE SET "
+        + ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+    )
+    SELECT_SQL = "SELECT * FROM tickets WHERE ticket_id = ?"
+    LIST_SQL = "SELECT * FROM tickets ORDER BY created_at DESC, ticket_id DESC LIMIT ? OFFSET ?"
+    # Keyset page: seeks straight to the cursor on idx_tickets_created_id
+    # instead of scanning and discarding OFFSET rows. The cursor includes
+    # ticket_id, since batched saves and the legacy import give several
+    # tickets the same created_at
+    LIST_BEFORE_SQL = (
+        "SELECT * FROM tickets WHERE (created_at, ticket_id) < (?, ?) "
+        "ORDER BY created_at DESC, ticket_id DESC LIMIT ?"
+    )
+    DELETE_SQL = "DELETE FROM tickets WHERE ticket_id = ?"
+    STATS_SQL = (
+        "SELECT COUNT(*) AS total, "
+        "COALESCE(SUM(status = 'open'), 0) AS open, "
+        "COALESCE(SUM(priority = 'P1'), 0) AS critical, "
+        "COALESCE(SUM(auto_generated), 0) AS auto_generated "
+        "FROM tickets"
+    )
+    # Bumped by the ticket_changes triggers on every insert, update and
+    # delete, so it moves whenever the stored tickets do, whatever their
+    # timestamps
+    VERSION_SQL = "SELECT version FROM ticket_changes"
+    SEARCH_SQL = (
+        "SELECT t.* FROM tickets t JOIN tickets_fts f ON t.rowid = f.rowid "
+        "WHERE tickets_fts MATCH ? ORDER BY t.created_at DESC LIMIT ?"
+    )
+    # Trigrams can't match queries shorter than three characters
+    SHORT_SEARCH_SQL = (
+        "SELECT * FROM tickets WHERE "
+        + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in SEARCH_COLUMNS)
+        + " ORDER BY created_at DESC LIMIT ?"
+    )
+
+    BUSY_TIMEOUT_MS = 10000
+
     def __init__(self, storage_path="ticket_storage"):
         self.storage_path = storage_path
         # Create storage directory if it doesn't exist
         if not os.path.exists(storage_path):
             os.makedirs(storage_path)
 
+        # A single connection in autocommit mode; WAL keeps readers from
+        # blocking on writes
+        self.db_path = os.path.join(storage_path, "tickets.db")
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # Other workers share the file; wait for their write locks rather
+        # than failing straight away with "database is locked"
+        self.conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+        fts_exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_fts'"
+        ).fetchone()
+        self.conn.executescript(self.FTS_SCHEMA)
+        if not fts_exists:
+            # Index any tickets stored before the search index existed
+            self.conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+
+        # All database work from async code runs on this single thread, which
+        # keeps the event loop free and serializes access to the connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ticket-db")
+
+        self._import_json_tickets()
+
+    def _import_json_tickets(self):
+        """Move tickets saved by the old one-file-per-ticket storage into the database"""
+        with os.scandir(self.storage_path) as it:
+            entries = [entry for entry in it if entry.name.endswith('.json') and entry.is_file()]
+
+        # Import oldest first, using the stat data cached on each entry
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+        imported = []
+        tickets = []
+        for entry in entries:
+            try:
+                with open(entry.path, 'rb') as f:
+                    tickets.append(Ticket(**_loads(f.read())))
+                imported.append(entry)
+            except FileNotFoundError:
+                # Another worker starting alongside this one got there first
+                continue
+            except Exception as e:
+                print(f"Error importing ticket {entry.name}: {str(e)}")
+
+        # One transaction for the whole import instead of a commit per file.
+        # Workers may race to import the same files; the upsert makes the
+        # second copy a no-op
+        if tickets and self.save_batch(tickets):
+            for entry in imported:
+                try:
+                    os.replace(entry.path, entry.path + ".imported")
+                except FileNotFoundError:
+                    continue
+
+    async def run(self, func, *args):
+        """Run a storage method on the database thread without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def close(self):
+        """Finish pending database work and close the connection"""
+        self._executor.shutdown(wait=True)
+        self.conn.close()
+
+    def _row_to_ticket(self, row: sqlite3.Row) -> Ticket:
+        """Build a Ticket from a database row"""
+        return Ticket(**dict(row))
+
     def save_ticket(self, ticket: Ticket) -> bool:
         """Save a ticket to persistent storage"""
         try:
-            file_path = os.path.join(self.storage_path, f"{ticket.ticket_id}.json")
-            with open(file_path, 'w') as f:
-                json.dump(ticket.dict(), f, indent=2)
+            data = ticket.model_dump()
+            self.conn.execute(self.INSERT_SQL, [data[column] for column in self.COLUMNS])
+            return True
+        except Exception as e:
+            print(f"Error saving ticket {ticket.ticket_id}: {str(e)}")
+            return False
+
+    def save_batch(self, tickets: List[Ticket]) -> bool:
+        """Save several tickets in a single transaction"""
+        try:
+            # Take the write lock up front: a deferred transaction that has
+            # to upgrade from reading can fail with SQLITE_BUSY without
+            # waiting out the busy timeout
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                self.INSERT_SQL,
+                ([data[column] for column in self.COLUMNS] for data in map(Ticket.model_dump, tickets))
+            )
+            self.conn.execute("COMMIT")
             return True
         except Exception as e:
-            print(f"Error saving ticket: {str(e)}")
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            print(f"Error saving a batch of {len(tickets)} tickets: {str(e)}")
             return False
 
     def load_ticket(self, ticket_id: str) -> Optional[Ticket]:
         """Load a ticket from persistent storage"""
-        file_path = os.path.join(self.storage_path, f"{ticket_id}.json")
-        if not os.path.exists(file_path):
-            return None
-
         try:
-            with open(file_path, 'r') as f:
-                ticket_data = json.load(f)
-                return Ticket(**ticket_data)
+            row = self.conn.execute(self.SELECT_SQL, (ticket_id,)).fetchone()
+            return self._row_to_ticket(row) if row else None
         except Exception as e:
             print(f"Error loading ticket: {str(e)}")
             return None
 
-    def list_tickets(self, limit: int = 100, offset: int = 0) -> List[Ticket]:
-        """List tickets with pagination"""
-        tickets = []
-
-        # Get all ticket files
-        if os.path.exists(self.storage_path):
-            ticket_files = [f for f in os.listdir(self.storage_path) if f.endswith('.json')]
-            # Sort by creation time (newest first)
-            ticket_files.sort(reverse=True)
-
-            # Apply pagination
-            paginated_files = ticket_files[offset:offset + limit]
-
-            # Load ticket data
-            for file_name in paginated_files:
-                file_path = os.path.join(self.storage_path, file_name)
-                try:
-                    with open(file_path, 'r') as f:
-                        ticket_data = json.load(f)
-                        tickets.append(Ticket(**ticket_data))
-                except Exception as e:
-                    print(f"Error loading ticket {file_name}: {str(e)}")
-
-        return tickets
+    def list_tickets(self, limit: int = 100, offset: int = 0, before: Optional[str] = None) -> List[Ticket]:
+        """List tickets with pagination, newest first, optionally created before a cursor"""
+        try:
+            if before is not None:
+                # A bare timestamp, with no ticket_id part, pages strictly
+                # before that instant
+                created_at, _, ticket_id = before.partition(CURSOR_SEPARATOR)
+                rows = self.conn.execute(self.LIST_BEFORE_SQL, (created_at, ticket_id, limit)).fetchall()
+            else:
+                rows = self.conn.execute(self.LIST_SQL, (limit, offset)).fetchall()
+            return [self._row_to_ticket(row) for row in rows]
+        except Exception as e:
+            print(f"Error listing tickets: {str(e)}")
+            return []
 
     def delete_ticket(self, ticket_id: str) -> bool:
         """Delete a ticket from persistent storage"""
-        file_path = os.path.join(self.storage_path, f"{ticket_id}.json")
-        if not os.path.exists(file_path):
-            return False
-
         try:
-            os.remove(file_path)
-            return True
+            cursor = self.conn.execute(self.DELETE_SQL, (ticket_id,))
+            return cursor.rowcount > 0
         except Exception as e:
             print(f"Error deleting ticket: {str(e)}")
             return False
 
-    def search_tickets(self, query: str) -> List[Ticket]:
-        """Search tickets by content"""
-        matching_tickets = []
+    def ticket_stats(self) -> Dict[str, int]:
+        """Count tickets for the dashboard in a single aggregate query"""
+        try:
+            return dict(self.conn.execute(self.STATS_SQL).fetchone())
+        except Exception as e:
+            print(f"Error computing ticket stats: {str(e)}")
+            return {"total": 0, "open": 0, "critical": 0, "auto_generated": 0}
+
+    def read_snapshot(self, func, *args) -> Tuple[int, Any]:
+        """Call a read method inside one transaction, returning the ticket version it saw with its result"""
+        # WAL gives the whole transaction a single snapshot, so the version
+        # and the rows can't come from different moments
+        self.conn.execute("BEGIN")
+        try:
+            version = self.conn.execute(self.VERSION_SQL).fetchone()[0]
+            return version, func(*args)
+        finally:
+            self.conn.execute("COMMIT")
 
-        if os.path.exists(self.storage_path):
-            for file_name in os.listdir(self.storage_path):
-                if not file_name.endswith('.json'):
-                    continue
+    def dashboard(self, limit: int) -> Tuple[List[Ticket], Dict[str, int]]:
+        """Newest tickets along with the dashboard counts"""
+        return self.list_tickets(limit, 0), self.ticket_stats()
 
-                file_path = os.path.join(self.storage_path, file_name)
-                try:
-                    with open(file_path, 'r') as f:
-                        ticket_data = json.load(f)
+    def tickets_version(self) -> int:
+        """Change counter that moves whenever the stored tickets change"""
+        return self.conn.execute(self.VERSION_SQL).fetchone()[0]
 
-                        # Search in ticket content
-                        ticket_str = json.dumps(ticket_data).lower()
-                        if query.lower() in ticket_str:
-                            matching_tickets.append(Ticket(**ticket_data))
-                except Exception as e:
-                    print(f"Error searching ticket {file_name}: {str(e)}")
+    def data_version(self) -> int:
+        """Counter SQLite bumps whenever another connection, such as another worker, commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
 
-        return matching_tickets
+    def search_tickets(self, query: str) -> List[Ticket]:
+        """Search tickets by content, returning at most MAX_PAGE_SIZE of the newest matches"""
+        try:
+            if len(query) >= 3:
+                # Quote the query as a single FTS5 phrase so it is matched literally
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self.conn.execute(self.SEARCH_SQL, (phrase, MAX_PAGE_SIZE)).fetchall()
+            else:
+                escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                pattern = f"%{escaped}%"
+                params = (pattern,) * len(self.SEARCH_COLUMNS) + (MAX_PAGE_SIZE,)
+                rows = self.conn.execute(self.SHORT_SEARCH_SQL, params).fetchall()
+            return [self._row_to_ticket(row) for row in rows]
+        except Exception as e:
+            print(f"Error searching tickets: {str(e)}")
+            return []
 
 
 # Define base agent class
@@ -158,18 +498,27 @@ class Agent:
 
     def __init__(self, name):
         self.name = name
-        self.memory = []
+        # Keep memory size manageable: the oldest entries are dropped automatically
+        self.memory = deque(maxlen=100)
 
     def add_to_memory(self, data):
         """Add data to agent memory"""
+        # Store a raw nanosecond timestamp; it is only formatted when read
         self.memory.append({
-            "timestamp": datetime.now().isoformat(),
+            "ts_ns": time.time_ns(),
             "data": data
         })
 
-        # Keep memory size manageable
-        if len(self.memory) > 100:
-            self.memory = self.memory[-100:]
+    @property
+    def memory_log(self) -> List[Dict[str, Any]]:
+        """Agent memory with ISO formatted timestamps"""
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(entry["ts_ns"] / 1e9).isoformat(),
+                "data": entry["data"]
+            }
+            for entry in self.memory
+        ]
 
     async def process(self, input_data: Dict[str, Any]) -> str:
         """Process input data - to be implemented by subclasses"""
@@ -180,29 +529,58 @@ class Agent:
 class VisionAgent(Agent):
     """Agent specialized in visual understanding"""
 
+    # Magic bytes used to label the data URI with the upload's real type
+    IMAGE_SIGNATURES = (
+        (b"\x89PNG\r\n\x1a\n", "image/png"),
+        (b"\xff\xd8\xff", "image/jpeg"),
+        (b"GIF87a", "image/gif"),
+        (b"GIF89a", "image/gif"),
+        (b"BM", "image/bmp"),
+    )
+
     def __init__(self):
         super().__init__("Vision Agent")
-
-        self.api_key = hf_api_key
-        self.api_endpoint = "https://openrouter.ai/api/v1/chat/completions"
+        # Shared by the vision pool threads, hence the lock
+        self._data_uri_cache: LRUCache = LRUCache(maxsize=VISION_CACHE_BYTES, getsizeof=len)
+        self._data_uri_lock = threading.Lock()
+
+        self.api_endpoint = LLM_ENDPOINT
+        self._headers = LLM_HEADERS
+        # Request fields that are the same on every call
+        self._payload_base = {
+            "model": "meta-llama/llama-3.1-8b-vision:free",  # Use the vision-specific model
+            "max_tokens": 1024,
+            "temperature": 0.7
+        }
 
     async def process(self, input_data: Dict[str, Any]) -> str:
         """Process image and prompt"""
-        image_data = input_data.get('image_data')
+        # Either raw bytes or a binary file object, such as a spooled upload
+        image = input_data.get('image_file') or input_data.get('image_data')
         prompt = input_data.get('prompt', 'Describe this image')
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://your-site.com",
-            "X-Title": "ITSM & Operations Automation Portal"
-        }
+        async with vision_semaphore():
+            loop = asyncio.get_running_loop()
+            # Encoding, serializing and keying all scale with the image, so
+            # none of it runs on the event loop
+            body, key_source = await loop.run_in_executor(_vision_pool, self.build_request, image, prompt)
+            return await self._describe(body, key_source)
 
-        base64_image = base64.b64encode(image_data).decode('utf-8')
+    async def _describe(self, body: bytes, key_source: bytes) -> str:
+        """Ask the vision model about an encoded image"""
+        try:
+            result = await send_chat_body(self.api_endpoint, self._headers, body, key_source)
+            self.add_to_memory({"type": "vision_analysis", "result": result})
+            return result
+        except Exception as e:
+            return f"Error in vision processing: {str(e)}"
 
+    def build_request(self, image: Union[bytes, BinaryIO], prompt: str) -> Tuple[bytes, bytes]:
+        """Serialize the request body for an image and prompt, along with its cache key source"""
+        digest, image_url = self.build_data_uri(image)
         # Corrected for Llama 3.1 Vision
         payload = {
-            "model": "meta-llama/llama-3.1-8b-vision:free",  # Use the vision-specific model
+            **self._payload_base,
             "messages": [
                 {
                     "role": "user",
@@ -214,28 +592,51 @@ class VisionAgent(Agent):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": image_url
                             }
                         }
                     ]
                 }
-            ],
-            "max_tokens": 1024,
-            "temperature": 0.7
+            ]
         }
-
-        try:
-            response = requests.post(
-                self.api_endpoint,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()["choices"][0]["message"]["content"]
-            self.add_to_memory({"type": "vision_analysis", "result": result})
-            return result
-        except Exception as e:
-            return f"Error in vision processing: {str(e)}"
+        # Keyed on the image digest rather than the multi-megabyte body
+        key_source = _dumps((self._payload_base["model"], prompt, digest.hex()))
+        return _dumps(payload), key_source
+
+    def build_data_uri(self, image: Union[bytes, BinaryIO]) -> Tuple[bytes, str]:
+        """Encode an image as a data URI labelled with its detected type, returning its digest too"""
+        image_data = image if isinstance(image, bytes) else image.read()
+
+        # xxh3 hashes far faster than base64 encodes, so a lookup is cheap
+        key = xxhash.xxh3_128_digest(image_data)
+        with self._data_uri_lock:
+            cached = self._data_uri_cache.get(key)
+        if cached is not None:
+            return key, cached
+
+        # Base64 output is pure ASCII, so build the data URI in one step;
+        # pybase64 uses SIMD encoding and is several times faster than stdlib
+        mime_type = self.detect_mime_type(image_data)
+        data_uri = f"data:{mime_type};base64," + pybase64.b64encode_as_string(image_data)
+        with self._data_uri_lock:
+            try:
+                self._data_uri_cache[key] = data_uri
+            except ValueError:
+                # Larger than the whole cache; just don't keep it
+                pass
+        return key, data_uri
+
+    def detect_mime_type(self, image_data: bytes) -> str:
+        """Detect the image MIME type from its leading bytes"""
+        for signature, mime_type in self.IMAGE_SIGNATURES:
+            if image_data.startswith(signature):
+                return mime_type
+
+        if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+            return "image/webp"
+
+        # Fall back to JPEG, which the endpoint assumed before
+        return "image/jpeg"
 
 
 class TextAgent(Agent):
@@ -243,8 +644,14 @@ class TextAgent(Agent):
 
     def __init__(self):
         super().__init__("Text Agent")
-        self.api_key = hf_api_key
-        self.api_endpoint = "https://openrouter.ai/api/v1/chat/completions"
+        self.api_endpoint = LLM_ENDPOINT
+        self._headers = LLM_HEADERS
+        # Request fields that are the same on every call
+        self._payload_base = {
+            "model": "meta-llama/llama-3.1-8b-instruct:free",
+            "max_tokens": 1024,
+            "temperature": 0.7
+        }
 
     async def process(self, input_data: Dict[str, Any]) -> str:
         """Process text query"""
@@ -253,33 +660,21 @@ class TextAgent(Agent):
         # Store the original prompt for fallback
         original_question = prompt
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://your-site.com",
-            "X-Title": "ITSM & Operations Automation Portal"
-        }
-
         payload = {
-            "model": "meta-llama/llama-3.1-8b-instruct:free",
+            **self._payload_base,
             "messages": [
                 {
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            "max_tokens": 1024,
-            "temperature": 0.7
+            ]
         }
 
+        # Questions that differ only in case or spacing share a cached answer
+        key_source = _dumps((self._payload_base["model"], " ".join((prompt or "").lower().split())))
+
         try:
-            response = requests.post(
-                self.api_endpoint,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()["choices"][0]["message"]["content"]
+            result = await chat_completion(self.api_endpoint, self._headers, payload, key_source)
             self.add_to_memory({"type": "text_analysis", "result": result})
             return result
         except Exception as e:
@@ -308,75 +703,234 @@ class TextAgent(Agent):
 class TicketAgent(Agent):
     """Agent specialized in handling support tickets"""
 
+    # A batch the database refuses is retried this many times, with a
+    # growing pause, before its tickets are given up on
+    WRITE_ATTEMPTS = 3
+    WRITE_RETRY_DELAY = 0.5
+
     def __init__(self):
         super().__init__("Ticket Agent")
-        self.tickets: Dict[str, Ticket] = {}
+        # Bounded cache of recently used tickets, keyed by ticket_id
+        self.tickets: LRUCache = LRUCache(maxsize=2048)
+        # Short-lived cache of list pages and dashboard views, each tagged
+        # with the ticket version it was read at, so dashboard polling
+        # doesn't re-read the rows on every request
+        self.list_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+        # Recent search results, so rapid retyping doesn't re-run the query
+        self.search_cache: TTLCache = TTLCache(maxsize=64, ttl=5)
+        # One queue per connected /tickets/stream client
+        self.subscribers: Set[asyncio.Queue] = set()
+        # New tickets waiting for the background writer; while it isn't
+        # running, create saves inline instead. The queue is made by
+        # start_writer() on the running loop: before Python 3.10 a queue
+        # built at import binds to a different loop than uvicorn's
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        # Tickets are cached lazily as they are read, so startup doesn't
+        # depend on how many are stored
         self.ticket_manager = TicketManager()
 
-        # Load existing tickets from storage
-        stored_tickets = self.ticket_manager.list_tickets()
-        for ticket in stored_tickets:
-            self.tickets[ticket.ticket_id] = ticket
-
-    async def process(self, input_data: Dict[str, Any]) -> str:
+    def subscribe(self) -> asyncio.Queue:
+        """Register a listener for ticket changes"""
+        # A single slot is enough: a pending notification already tells the
+        # client to refresh, so further changes are coalesced into it
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a listener registered with subscribe()"""
+        self.subscribers.discard(queue)
+
+    def start_writer(self):
+        """Save created tickets from a background task instead of on the request path"""
+        if self._writer is None:
+            self._write_queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_tickets())
+
+    async def stop_writer(self):
+        """Flush queued tickets, then stop the background writer"""
+        if self._writer is not None:
+            await self._write_queue.join()
+            self._writer.cancel()
+            self._writer = None
+            self._write_queue = None
+
+    async def _write_tickets(self):
+        """Drain the write queue, saving everything waiting in one transaction"""
+        while True:
+            batch = [await self._write_queue.get()]
+            while not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            try:
+                for attempt in range(self.WRITE_ATTEMPTS):
+                    if await self.ticket_manager.run(self.ticket_manager.save_batch, batch):
+                        self._tickets_saved(batch)
+                        break
+                    if attempt + 1 < self.WRITE_ATTEMPTS:
+                        await asyncio.sleep(self.WRITE_RETRY_DELAY * (attempt + 1))
+                else:
+                    self._tickets_lost(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    def _tickets_saved(self, tickets: List[Ticket]):
+        """Refresh caches and tell listeners about newly stored tickets"""
+        self._invalidate_caches()
+        for ticket in tickets:
+            self._publish_change("created", ticket.ticket_id)
+
+    def _tickets_lost(self, tickets: List[Ticket]):
+        """Forget tickets that could not be stored, so the cache never serves them"""
+        for ticket in tickets:
+            self.tickets.pop(ticket.ticket_id, None)
+        print(f"Dropped {len(tickets)} tickets that could not be saved: "
+              + ", ".join(ticket.ticket_id for ticket in tickets))
+
+    async def _cached_view(self, key: Tuple, version: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Cached list or dashboard view, but only if it was read at the current ticket version"""
+        cached = self.list_cache.get(key)
+        if cached is None:
+            return None
+        if version is None:
+            version = await self.ticket_manager.run(self.ticket_manager.tickets_version)
+        # Another worker's writes, or a change still in flight here, leave
+        # an entry from an older version behind; it is never served
+        return cached if cached["version"] == version else None
+
+    def _invalidate_caches(self):
+        """Drop cached list pages and search results after tickets change"""
+        self.list_cache.clear()
+        self.search_cache.clear()
+
+    def _publish_change(self, event: str, ticket_id: Optional[str]):
+        """Notify listeners that the stored tickets changed"""
+        for queue in self.subscribers:
+            if queue.empty():
+                queue.put_nowait({"event": event, "ticket_id": ticket_id})
+
+    async def watch_external_changes(self, interval: float = 1.0):
+        """Pick up tickets created or deleted by other worker processes"""
+        version = await self.ticket_manager.run(self.ticket_manager.data_version)
+        while True:
+            await asyncio.sleep(interval)
+            current = await self.ticket_manager.run(self.ticket_manager.data_version)
+            if current != version:
+                version = current
+                # Cached tickets may have been deleted by the other worker
+                self.tickets.clear()
+                self._invalidate_caches()
+                self._publish_change("changed", None)
+
+    async def process(self, input_data: Dict[str, Any]) -> Any:
         """Process ticket creation and management"""
         action = input_data.get('action', 'create')
 
         if action == 'create':
+            # One clock read serves both timestamps
+            now = datetime.now().isoformat()
             ticket = Ticket(
                 issue=input_data['issue'],
                 category=input_data.get('category', 'incident'),
                 priority=input_data.get('priority', 'P3'),
                 assigned_team=input_data.get('assigned_team', None),
-                time=datetime.now().isoformat(),
+                time=now,
                 ip=input_data['ip'],
-                auto_generated=input_data.get('auto_generated', False)
+                auto_generated=input_data.get('auto_generated', False),
+                created_at=now
             )
             self.tickets[ticket.ticket_id] = ticket
             # Save to persistent storage
-            self.ticket_manager.save_ticket(ticket)
+            if self._writer is not None:
+                self._write_queue.put_nowait(ticket)
+            elif await self.ticket_manager.run(self.ticket_manager.save_ticket, ticket):
+                self._tickets_saved([ticket])
+            else:
+                self._tickets_lost([ticket])
+                return "Error creating ticket: it could not be saved"
             self.add_to_memory({"type": "ticket_created", "ticket_id": ticket.ticket_id})
             return f"Ticket created successfully. Ticket ID: {ticket.ticket_id}"
 
             # Rest of the method remains the same
 
         elif action == 'list':
-            # Get tickets from storage to ensure we have the latest
-            stored_tickets = self.ticket_manager.list_tickets(
-                limit=input_data.get('limit', 100),
-                offset=input_data.get('offset', 0)
+            # A page is returned with the ticket version it was read at, as
+            # {"version": ..., "tickets": [...]}, so callers can tag it
+            limit = input_data.get('limit', 100)
+            offset = input_data.get('offset', 0)
+            before = input_data.get('before')
+            key = ("list", limit, offset, before)
+
+            cached = await self._cached_view(key, input_data.get('version'))
+            if cached is not None:
+                return cached
+
+            version, stored_tickets = await self.ticket_manager.run(
+                self.ticket_manager.read_snapshot, self.ticket_manager.list_tickets, limit, offset, before
+            )
+            for ticket in stored_tickets:
+                self.tickets[ticket.ticket_id] = ticket
+            # Plain dicts, so the route serializes the page exactly once
+            result = {"version": version, "tickets": TICKET_LIST_ADAPTER.dump_python(stored_tickets)}
+            self.list_cache[key] = result
+            return result
+
+        elif action == 'dashboard':
+            # Newest tickets and counts from one snapshot, returned as
+            # {"version": ..., "tickets": [...], "stats": {...}}
+            limit = input_data.get('limit', 10)
+            key = ("dashboard", limit)
+
+            cached = await self._cached_view(key, input_data.get('version'))
+            if cached is not None:
+                return cached
+
+            version, (stored_tickets, counts) = await self.ticket_manager.run(
+                self.ticket_manager.read_snapshot, self.ticket_manager.dashboard, limit
             )
-            return json.dumps([ticket.dict() for ticket in stored_tickets])
+            result = {"version": version, "tickets": TICKET_LIST_ADAPTER.dump_python(stored_tickets), "stats": counts}
+            self.list_cache[key] = result
+            return result
 
         elif action == 'get':
             ticket_id = input_data.get('ticket_id')
             # Try to get from memory first, then from storage
             if ticket_id in self.tickets:
-                return json.dumps(self.tickets[ticket_id].dict())
+                return self.tickets[ticket_id].model_dump_json()
             else:
-                ticket = self.ticket_manager.load_ticket(ticket_id)
+                ticket = await self.ticket_manager.run(self.ticket_manager.load_ticket, ticket_id)
                 if ticket:
                     self.tickets[ticket_id] = ticket
-                    return json.dumps(ticket.dict())
+                    return ticket.model_dump_json()
             return "Ticket not found"
 
         elif action == 'delete':
             ticket_id = input_data.get('ticket_id')
+            # A ticket still waiting for the writer must be stored before it
+            # can be deleted
+            if self._write_queue is not None:
+                await self._write_queue.join()
             if ticket_id in self.tickets:
-                # Remove from memory
-                del self.tickets[ticket_id]
-                # Remove from storage
-                success = self.ticket_manager.delete_ticket(ticket_id)
+                # Remove from storage first; caches are only dropped once the
+                # row is gone, so a list built during the await can't be
+                # cached with the deleted ticket in it
+                success = await self.ticket_manager.run(self.ticket_manager.delete_ticket, ticket_id)
                 if success:
+                    self.tickets.pop(ticket_id, None)
+                    self._invalidate_caches()
+                    self._publish_change("deleted", ticket_id)
                     self.add_to_memory({"type": "ticket_deleted", "ticket_id": ticket_id})
                     return f"Ticket {ticket_id} deleted successfully"
                 else:
                     return f"Error deleting ticket {ticket_id} from storage"
             else:
                 # Check if it exists in storage
-                if self.ticket_manager.load_ticket(ticket_id):
-                    success = self.ticket_manager.delete_ticket(ticket_id)
+                if await self.ticket_manager.run(self.ticket_manager.load_ticket, ticket_id):
+                    success = await self.ticket_manager.run(self.ticket_manager.delete_ticket, ticket_id)
                     if success:
+                        self._invalidate_caches()
+                        self._publish_change("deleted", ticket_id)
                         self.add_to_memory({"type": "ticket_deleted", "ticket_id": ticket_id})
                         return f"Ticket {ticket_id} deleted successfully"
                 return "Ticket not found"
@@ -386,8 +940,21 @@ class TicketAgent(Agent):
             if not query:
                 return "Search query is required"
 
-            matching_tickets = self.ticket_manager.search_tickets(query)
-            return json.dumps([ticket.dict() for ticket in matching_tickets])
+            cached = self.search_cache.get(query)
+            if cached is not None:
+                return cached
+
+            matching_tickets = await self.ticket_manager.run(self.ticket_manager.search_tickets, query)
+            result = TICKET_LIST_ADAPTER.dump_python(matching_tickets)
+            self.search_cache[query] = result
+            return result
+
+        elif action == 'stats':
+            # Aggregated in the database; returned as a dict, not a JSON string
+            return await self.ticket_manager.run(self.ticket_manager.ticket_stats)
+
+        elif action == 'version':
+            return await self.ticket_manager.run(self.ticket_manager.tickets_version)
 
         return "Invalid action"
 
@@ -395,6 +962,14 @@ class TicketAgent(Agent):
 class IssueDetectionAgent(Agent):
     """Agent specialized in detecting issues that require a support ticket"""
 
+    # Map importance to priority
+    PRIORITY_MAP = {
+        "critical": "P1",
+        "high": "P2",
+        "medium": "P3",
+        "low": "P4"
+    }
+
     def __init__(self):
 
         super().__init__("Issue Detection Agent")
@@ -414,74 +989,81 @@ class IssueDetectionAgent(Agent):
             "low": []  # Default level if no high or medium indicators are found
         }
 
-    def determine_importance(self, text: str) -> str:
-        """Determine ticket importance based on text content"""
-        text = text.lower()
+        # Additional pattern matching for error messages. Only the presence of
+        # a match matters, so the patterns stop at the distinguishing prefix
+        # rather than consuming the rest of the line.
+        self.error_patterns = [
+            r"error\s*:",
+            r"exception\s*:",
+            r"failed\s*to",
+            r"cannot",
+            r"unable\s*to"
+        ]
 
-        # Check for high severity indicators
-        for indicator in self.severity_indicators["high"]:
-            if indicator in text:
-                return "critical"
+        # Words that pick the ticket category, checked in this order
+        self.category_keywords = [
+            ("request", "service_request"),
+            ("change", "change_request"),
+            ("recurring", "problem"),
+            ("pattern", "problem")
+        ]
 
-        # Check for medium severity indicators
-        for indicator in self.severity_indicators["medium"]:
-            if indicator in text:
-                return "high"
+        # One automaton over every word above, each mapped to the roles it
+        # plays, so a single pass over the text answers every question
+        roles: Dict[str, Set[str]] = {}
+        for keyword in self.issue_keywords:
+            roles.setdefault(keyword, set()).add("issue")
+        for level, indicators in self.severity_indicators.items():
+            for indicator in indicators:
+                roles.setdefault(indicator, set()).add(level)
+        for keyword, category in self.category_keywords:
+            roles.setdefault(keyword, set()).add(category)
+
+        self._automaton = ahocorasick.Automaton()
+        for word, word_roles in roles.items():
+            self._automaton.add_word(word, frozenset(word_roles))
+        self._automaton.make_automaton()
+
+        # One alternation, so a single scan of the text decides the match
+        self._error_pattern = re.compile("(?:" + "|".join(self.error_patterns) + ")", re.IGNORECASE)
+
+    def classify(self, text: str) -> Tuple[bool, str, str]:
+        """Scan the text once; return whether it reports an issue, its importance and category"""
+        found: Set[str] = set()
+        for _, word_roles in self._automaton.iter(text.lower()):
+            found |= word_roles
+
+        is_issue = "issue" in found or self._error_pattern.search(text) is not None
+
+        # A high severity indicator wins; default to medium for any issue
+        if "high" in found:
+            importance = "critical"
+        elif "medium" in found:
+            importance = "high"
+        else:
+            importance = "medium"
 
-        # Default to medium importance for any detected issue
-        return "medium"
+        category = next((category for _, category in self.category_keywords if category in found), "incident")
+        return is_issue, importance, category
+
+    def determine_importance(self, text: str) -> str:
+        """Determine ticket importance based on text content"""
+        return self.classify(text)[1]
 
     def detect_issue(self, text: str) -> bool:
         """Detect if text contains issue indicators"""
-        text = text.lower()
-
-        # Check for issue keywords
-        for keyword in self.issue_keywords:
-            if keyword in text:
-                return True
-
-        # Additional pattern matching for error messages
-        error_patterns = [
-            r"error\s*:\s*.*",
-            r"exception\s*:\s*.*",
-            r"failed\s*to\s*.*",
-            r"cannot\s*.*",
-            r"unable\s*to\s*.*"
-        ]
-
-        for pattern in error_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-
-        return False
+        return self.classify(text)[0]
 
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process text to detect issues and create ticket data if needed"""
         text = input_data.get('text', '')
+        is_issue, importance, category = self.classify(text)
 
-        if self.detect_issue(text):
-            importance = self.determine_importance(text)
-
-            # Map importance to priority
-            priority_map = {
-                "critical": "P1",
-                "high": "P2",
-                "medium": "P3",
-                "low": "P4"
-            }
-            priority = priority_map.get(importance, "P3")
+        if is_issue:
+            priority = self.PRIORITY_MAP.get(importance, "P3")
 
             # Format the issue text
-            issue = f"Auto-detected issue: {text[:200]}" + ("..." if len(text) > 200 else "")
-
-            # Determine category based on content
-            category = "incident"  # Default
-            if "request" in text.lower():
-                category = "service_request"
-            elif "change" in text.lower():
-                category = "change_request"
-            elif "recurring" in text.lower() or "pattern" in text.lower():
-                category = "problem"
+            issue = f"Auto-detected issue: {text[:200]}{'...' if len(text) > 200 else ''}"
 
             result = {
                 "issue_detected": True,
@@ -510,15 +1092,33 @@ class CoordinatorAgent(Agent):
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Coordinate between agents and combine their responses"""
         query_type = input_data.get('type', 'text')
-        prompt = input_data.get('prompt', '')
 
-        # First, check if there's an issue requiring a ticket
-        issue_agent = self.agents.get('Issue Detection Agent')
-        ticket_agent = self.agents.get('Ticket Agent')
-        auto_ticket = None
+        # Answer the query and check for ticket-worthy issues concurrently
+        response, auto_ticket = await asyncio.gather(
+            self._respond(query_type, input_data),
+            self._create_auto_ticket(query_type, input_data)
+        )
+
+        self.add_to_memory({
+            "type": "coordination",
+            "query_type": query_type,
+            "response": response,
+            "auto_ticket": auto_ticket
+        })
+
+        result = {
+            "response": response,
+            "result": response
+        }
+        if auto_ticket:
+            result["auto_ticket"] = auto_ticket
+
+        return result
+
+    async def _respond(self, query_type: str, input_data: Dict[str, Any]) -> str:
+        """Route the query to the matching agent(s)"""
         response = ""
 
-        # Process the actual query first to ensure we always have a response
         if query_type == 'vision':
             vision_agent = self.agents.get('Vision Agent')
             if vision_agent:
@@ -528,15 +1128,25 @@ class CoordinatorAgent(Agent):
             if text_agent:
                 response = await text_agent.process(input_data)
         else:
-            # For complex queries, we can combine multiple agents
-            combined_response = []
-            for agent in self.agents.values():
-                if agent.name not in ['Issue Detection Agent']:  # Skip the issue detection in combined response
-                    agent_response = await agent.process(input_data)
-                    combined_response.append(f"{agent.name}: {agent_response}")
+            # For complex queries, we can combine multiple agents, queried
+            # concurrently since their calls are independent
+            agents = [agent for agent in self.agents.values()
+                      if agent.name not in ['Issue Detection Agent']]  # Skip the issue detection in combined response
+            agent_responses = await asyncio.gather(*(agent.process(input_data) for agent in agents))
+            combined_response = [f"{agent.name}: {agent_response}"
+                                 for agent, agent_response in zip(agents, agent_responses)]
             response = "\n".join(combined_response)
 
-        # Now try to detect issues and create tickets if needed, but don't let failures affect the response
+        return response
+
+    async def _create_auto_ticket(self, query_type: str, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Detect issues in the prompt and create a ticket if needed"""
+        issue_agent = self.agents.get('Issue Detection Agent')
+        ticket_agent = self.agents.get('Ticket Agent')
+        prompt = input_data.get('prompt', '')
+        auto_ticket = None
+
+        # Don't let ticket creation failures affect the response
         try:
             if issue_agent and ticket_agent and query_type == 'text':
                 issue_result = await issue_agent.process({'text': prompt})
@@ -563,23 +1173,8 @@ class CoordinatorAgent(Agent):
                     }
         except Exception as e:
             print(f"Error in ticket creation: {str(e)}")
-            # Don't let ticket creation errors affect the response
 
-        self.add_to_memory({
-            "type": "coordination",
-            "query_type": query_type,
-            "response": response,
-            "auto_ticket": auto_ticket
-        })
-
-        result = {
-            "response": response,
-            "result": response
-        }
-        if auto_ticket:
-            result["auto_ticket"] = auto_ticket
-
-        return result
+        return auto_ticket
 
 
 # Initialize agents
@@ -594,660 +1189,128 @@ coordinator.register_agent(text_agent)
 coordinator.register_agent(ticket_agent)
 coordinator.register_agent(issue_detection_agent)
 
-# Create FastAPI app
-app = FastAPI()
 
-# Configure templates
-templates = Jinja2Templates(directory="templates")
 
-# Serve static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
 
+    # Returned directly from the ticket routes, this skips FastAPI's
+    # jsonable_encoder pass, which walks every field of every ticket in
+    # Python before the default response class gets to render it
 
-@app.get("/")
-async def home():
-    """Render home page"""
-    html_content = """
-    <!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>ITSM & Operations Automation Portal</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.css">
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background-color: #f8f9fa;
-        }
-        .navbar-brand {
-            font-weight: 600;
-        }
-        .card {
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        .card-header {
-            font-weight: 600;
-            background-color: #f8f9fa;
-            border-bottom: 1px solid rgba(0,0,0,0.125);
-        }
-        .priority-badge {
-            padding: 5px 10px;
-            border-radius: 4px;
-            font-size: 12px;
-            font-weight: 600;
-        }
-        .priority-critical {
-            background-color: #dc3545;
-            color: white;
-        }
-        .priority-high {
-            background-color: #fd7e14;
-            color: white;
-        }
-        .priority-medium {
-            background-color: #ffc107;
-            color: black;
-        }
-        .priority-low {
-            background-color: #6c757d;
-            color: white;
-        }
-        .status-badge {
-            padding: 5px 10px;
-            border-radius: 4px;
-            font-size: 12px;
-            font-weight: 600;
-        }
-        .status-open {
-            background-color: #0d6efd;
-            color: white;
-        }
-        .status-in-progress {
-            background-color: #6f42c1;
-            color: white;
-        }
-        .status-resolved {
-            background-color: #198754;
-            color: white;
-        }
-        .status-closed {
-            background-color: #6c757d;
-            color: white;
-        }
-        .dashboard-card {
-            text-align: center;
-            padding: 20px;
-        }
-        .dashboard-number {
-            font-size: 36px;
-            font-weight: 700;
-            margin: 10px 0;
-        }
-        .ticket-list {
-            max-height: 600px;
-            overflow-y: auto;
-        }
-        .nav-tabs .nav-link {
-            font-weight: 500;
-        }
-        .tab-content {
-            padding: 20px;
-            background-color: white;
-            border: 1px solid #dee2e6;
-            border-top: none;
-            border-radius: 0 0 8px 8px;
-        }
-        .result {
-            margin-top: 20px;
-            padding: 15px;
-            background-color: #f8f9fa;
-            border-left: 4px solid #3498db;
-            border-radius: 4px;
-            white-space: pre-wrap;
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary mb-4">
-        <div class="container">
-            <a class="navbar-brand" href="#">
-                <i class="bi bi-gear-fill me-2"></i>ITSM & Operations Automation Portal
-            </a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav ms-auto">
-                    <li class="nav-item">
-                        <a class="nav-link active" href="#"><i class="bi bi-house-door me-1"></i>Dashboard</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="#"><i class="bi bi-ticket-perforated me-1"></i>Tickets</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="#"><i class="bi bi-book me-1"></i>Knowledge Base</a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container">
-        <!-- Dashboard Overview -->
-        <div class="row mb-4">
-            <div class="col-md-3">
-                <div class="card dashboard-card">
-                    <div class="card-body">
-                        <h6 class="card-subtitle mb-2 text-muted">Open Tickets</h6>
-                        <div class="dashboard-number text-primary" id="openTicketsCount">-</div>
-                        <p class="card-text"><small>Last updated: <span id="lastUpdated">-</span></small></p>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card dashboard-card">
-                    <div class="card-body">
-                        <h6 class="card-subtitle mb-2 text-muted">Critical Issues</h6>
-                        <div class="dashboard-number text-danger" id="criticalCount">-</div>
-                        <p class="card-text"><small>Requires immediate attention</small></p>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card dashboard-card">
-                    <div class="card-body">
-                        <h6 class="card-subtitle mb-2 text-muted">SLA Compliance</h6>
-                        <div class="dashboard-number text-success" id="slaCompliance">-</div>
-                        <p class="card-text"><small>Based on last 30 days</small></p>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card dashboard-card">
-                    <div class="card-body">
-                        <h6 class="card-subtitle mb-2 text-muted">Auto-Resolved</h6>
-                        <div class="dashboard-number text-info" id="autoResolved">-</div>
-                        <p class="card-text"><small>Issues fixed automatically</small></p>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Main Content Area -->
-        <div class="row">
-            <div class="col-md-8">
-                <div class="card">
-                    <div class="card-header">
-                        <ul class="nav nav-tabs card-header-tabs" id="mainTabs" role="tablist">
-                            <li class="nav-item" role="presentation">
-                                <button class="nav-link active" id="tickets-tab" data-bs-toggle="tab" data-bs-target="#tickets" type="button" role="tab">Ticket Management</button>
-                            </li>
-                            <li class="nav-item" role="presentation">
-                                <button class="nav-link" id="ai-assistant-tab" data-bs-toggle="tab" data-bs-target="#ai-assistant" type="button" role="tab">AI Assistant</button>
-                            </li>
-                            <li class="nav-item" role="presentation">
-                                <button class="nav-link" id="vision-tab" data-bs-toggle="tab" data-bs-target="#vision" type="button" role="tab">Vision Analysis</button>
-                            </li>
-                        </ul>
-                    </div>
-                    <div class="card-body p-0">
-                        <div class="tab-content" id="mainTabsContent">
-                            <!-- Tickets Tab -->
-                            <div class="tab-pane fade show active" id="tickets" role="tabpanel">
-                                <div class="mb-3">
-                                    <h5>Create New Ticket</h5>
-                                    <form id="ticketForm" class="row g-3">
-                                        <div class="col-md-12">
-                                            <label for="ticketIssue" class="form-label">Issue Description</label>
-                                            <textarea id="ticketIssue" name="issue" class="form-control" rows="3" placeholder="Describe the issue in detail" required></textarea>
-                                        </div>
-                                        <div class="col-md-4">
-                                            <label for="ticketCategory" class="form-label">Category</label>
-                                            <select id="ticketCategory" name="category" class="form-select" required>
-                                                <option value="incident">Incident</option>
-                                                <option value="service_request">Service Request</option>
-                                                <option value="problem">Problem</option>
-                                                <option value="change_request">Change Request</option>
-                                            </select>
-                                        </div>
-                                        <div class="col-md-4">
-                                            <label for="ticketPriority" class="form-label">Priority</label>
-                                            <select id="ticketPriority" name="priority" class="form-select" required>
-                                                <option value="P4">P4 - Low</option>
-                                                <option value="P3" selected>P3 - Medium</option>
-                                                <option value="P2">P2 - High</option>
-                                                <option value="P1">P1 - Critical</option>
-                                            </select>
-                                        </div>
-                                        <div class="col-md-4">
-                                            <label for="assignedTeam" class="form-label">Assign Team</label>
-                                            <select id="assignedTeam" name="assigned_team" class="form-select">
-                                                <option value="">-- Auto Assign --</option>
-                                                <option value="network">Network Team</option>
-                                                <option value="server">Server Team</option>
-                                                <option value="application">Application Support</option>
-                                                <option value="security">Security Team</option>
-                                            </select>
-                                        </div>
-                                        <div class="col-12">
-                                            <button type="submit" class="btn btn-primary">Create Ticket</button>
-                                        </div>
-                                    </form>
-                                </div>
-                                <div id="ticketResult" class="alert alert-success mt-3" style="display: none;"></div>
-                            </div>
-
-                            <!-- AI Assistant Tab -->
-                            <div class="tab-pane fade" id="ai-assistant" role="tabpanel">
-                                <h5>AI Support Assistant</h5>
-                                <p class="text-muted">Ask questions or describe issues for automated assistance</p>
-                                <form id="textForm">
-                                    <div class="mb-3">
-                                        <textarea id="textPrompt" name="prompt" class="form-control" rows="5" placeholder="Describe your IT issue or ask a question..." required></textarea>
-                                    </div>
-                                    <button type="submit" class="btn btn-primary">Get Assistance</button>
-                                </form>
-                                <div id="textResult" class="mt-3 p-3 bg-light rounded" style="display: none;"></div>
-                                <div id="autoTicketNotification" class="alert alert-success mt-3" style="display: none;"></div>
-                            </div>
-
-                            <!-- Vision Analysis Tab -->
-                            <div class="tab-pane fade" id="vision" role="tabpanel">
-                                <h5>Visual Issue Analysis</h5>
-                                <p class="text-muted">Upload screenshots or images for AI analysis</p>
-                                <form id="visionForm" enctype="multipart/form-data">
-                                    <div class="mb-3">
-                                        <label for="imageUpload" class="form-label">Upload Image</label>
-                                        <input class="form-control" type="file" id="imageUpload" name="image" accept="image/*" required>
-                                    </div>
-                                    <div class="mb-3">
-                                        <label for="visionPrompt" class="form-label">Analysis Instructions</label>
-                                        <textarea id="visionPrompt" name="prompt" class="form-control" rows="3" placeholder="What would you like to know about this image?">Analyze this screenshot and identify any errors or issues</textarea>
-                                    </div>
-                                    <button type="submit" class="btn btn-primary">Analyze Image</button>
-                                </form>
-                                <div id="visionResult" class="mt-3 p-3 bg-light rounded" style="display: none;"></div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <div class="col-md-4">
-                <div class="card">
-                    <div class="card-header d-flex justify-content-between align-items-center">
-                        <span>Recent Tickets</span>
-                        <div class="input-group" style="width: 60%;">
-                            <input type="text" id="ticketSearch" class="form-control form-control-sm" placeholder="Search tickets...">
-                            <button class="btn btn-sm btn-outline-secondary" type="button" onclick="searchTickets()">
-                                <i class="bi bi-search"></i>
-                            </button>
-                        </div>
-                    </div>
-                    <div class="card-body p-0">
-                        <div id="ticketList" class="ticket-list p-3">
-                            <div class="d-flex justify-content-center">
-                                <div class="spinner-border text-primary" role="status">
-                                    <span class="visually-hidden">Loading...</span>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        // Load tickets on page load
-        document.addEventListener('DOMContentLoaded', function() {
-            loadTickets();
-            updateDashboardStats();
-            startTicketPolling();
-        });
-
-        // Vision form submission
-        document.getElementById('visionForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-
-            const formData = new FormData();
-            const imageFile = document.getElementById('imageUpload').files[0];
-            const prompt = document.getElementById('visionPrompt').value;
-
-            if (!imageFile) {
-                alert('Please select an image');
-                return;
-            }
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
 
-            formData.append('image', imageFile);
-            formData.append('prompt', prompt);
-            const visionResult = document.getElementById('visionResult');
-            visionResult.style.display = 'block';
-            visionResult.innerHTML = '<div class="d-flex justify-content-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Processing...</span></div></div>';
-
-            try {
-                const res = await fetch('/vision', {
-                    method: 'POST',
-                    body: formData
-                });
-
-                const data = await res.json();
-                visionResult.innerHTML = `<div class="mb-2"><strong>Analysis Result:</strong></div><div>${data.result.replace(/\\n/g, '<br>')}</div>`;
-            } catch (error) {
-                visionResult.innerHTML = `<div class="alert alert-danger">Error: ${error.message}</div>`;
-            }
-        });
-
-        // Text form submission
-        document.getElementById('textForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-
-            const prompt = document.getElementById('textPrompt').value;
-            const textResult = document.getElementById('textResult');
-            textResult.style.display = 'block';
-            textResult.innerHTML = '<div class="d-flex justify-content-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Processing...</span></div></div>';
-
-            try {
-                const res = await fetch('/text', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ prompt })
-                });
-
-                const data = await res.json();
-
-                if (data.result) {
-                    textResult.innerHTML = data.result.replace(/\\n/g, '<br>');
-                } else if (data.response) {
-                    textResult.innerHTML = data.response.replace(/\\n/g, '<br>');
-                } else {
-                    textResult.innerHTML = '<div class="alert alert-warning">No response content received</div>';
-                }
 
-                if (data.auto_ticket && data.auto_ticket.created) {
-                    const notification = document.getElementById('autoTicketNotification');
-                    notification.style.display = 'block';
-                    notification.innerHTML = `<strong>Auto-generated ticket created:</strong><br>
-                                            Issue: ${data.auto_ticket.issue}<br>
-                                            Category: ${data.auto_ticket.category || 'incident'}<br>
-                                            Priority: ${data.auto_ticket.priority || 'P3 - Medium'}<br>
-                                            Team: ${data.auto_ticket.assigned_team || 'Auto Assigned'}`;
-                    // Refresh the ticket list
-                    loadTickets();
-                    updateDashboardStats();
-                }
-            } catch (error) {
-                textResult.innerHTML = `<div class="alert alert-danger">Error: ${error.message}</div>`;
-            }
-        });
-
-        // Ticket form submission
-        document.getElementById('ticketForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-
-            const issue = document.getElementById('ticketIssue').value;
-            const category = document.getElementById('ticketCategory').value;
-            const priority = document.getElementById('ticketPriority').value;
-            const assignedTeam = document.getElementById('assignedTeam').value;
-
-            const ticketResult = document.getElementById('ticketResult');
-            ticketResult.style.display = 'block';
-            ticketResult.innerHTML = '<div class="d-flex justify-content-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Creating ticket...</span></div></div>';
-
-            try {
-                const res = await fetch('/ticket', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ 
-                        issue, 
-                        category,
-                        priority,
-                        assigned_team: assignedTeam
-                    })
-                });
-
-                const data = await res.json();
-                ticketResult.innerHTML = `<div class="alert alert-success">${data.result}</div>`;
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background ticket tasks; flush them and close shared resources on shutdown"""
+    global _llm_semaphore, _vision_semaphore
+    # Bound to this server's loop
+    _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    _vision_semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
+    # With one process every change goes through this TicketAgent, so there
+    # is nothing to watch
+    watcher = asyncio.create_task(ticket_agent.watch_external_changes()) if WORKERS > 1 else None
+    ticket_agent.start_writer()
+    yield
+    if watcher:
+        watcher.cancel()
+    await ticket_agent.stop_writer()
+    await HTTP_CLIENT.aclose()
+    ticket_agent.ticket_manager.close()
+    _vision_pool.shutdown(wait=False)
 
-                // Reload ticket list and update stats
-                loadTickets();
-                updateDashboardStats();
 
-                // Clear form
-                document.getElementById('ticketIssue').value = '';
-            } catch (error) {
-                ticketResult.innerHTML = `<div class="alert alert-danger">Error: ${error.message}</div>`;
-            }
-        });
-
-        // Load tickets function
-        async function loadTickets() {
-            const ticketList = document.getElementById('ticketList');
-            ticketList.innerHTML = '<div class="d-flex justify-content-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div></div>';
-
-            try {
-                const res = await fetch('/tickets/list?limit=10');
-                const data = await res.json();
-
-                if (data.status === 'success') {
-                    if (data.tickets.length === 0) {
-                        ticketList.innerHTML = "<p class='text-center text-muted'>No tickets found.</p>";
-                    } else {
-                        ticketList.innerHTML = data.tickets.map(ticket => {
-                            // Determine priority class
-                            let priorityClass = 'priority-medium';
-                            if (ticket.priority === 'P1') {
-                                priorityClass = 'priority-critical';
-                            } else if (ticket.priority === 'P2') {
-                                priorityClass = 'priority-high';
-                            } else if (ticket.priority === 'P4') {
-                                priorityClass = 'priority-low';
-                            }
-
-                            // Format the date
-                            const createdDate = new Date(ticket.created_at);
-                            const formattedDate = createdDate.toLocaleString();
-
-                            // Format category for display
-                            const categoryDisplay = ticket.category ? ticket.category.replace('_', ' ').toUpperCase() : 'INCIDENT';
-
-                            // Format team for display
-                            const teamDisplay = ticket.assigned_team ? ticket.assigned_team.replace('_', ' ') : 'Auto Assigned';
-
-                            return `
-                                <div class="card mb-3">
-                                    <div class="card-body p-3">
-                                        <div class="d-flex justify-content-between align-items-center mb-2">
-                                            <span class="badge status-${ticket.status}">${ticket.status.toUpperCase()}</span>
-                                            <span class="badge ${priorityClass}">${ticket.priority || 'P3'}</span>
-                                        </div>
-                                        <h6 class="card-title">${ticket.issue.substring(0, 50)}${ticket.issue.length > 50 ? '...' : ''}</h6>
-                                        <div class="mt-2">
-                                            <small class="text-muted">Category: ${categoryDisplay}</small><br>
-                                            <small class="text-muted">Team: ${teamDisplay}</small>
-                                        </div>
-                                        <div class="d-flex justify-content-between align-items-center mt-3">
-                                            <small class="text-muted">${formattedDate}</small>
-                                            <button class="btn btn-sm btn-outline-danger" onclick="deleteTicket('${ticket.ticket_id}')">
-                                                <i class="bi bi-trash"></i>
-                                            </button>
-                                        </div>
-                                        ${ticket.auto_generated ? '<div class="mt-2"><span class="badge bg-info">Auto-generated</span></div>' : ''}
-                                    </div>
-                                </div>
-                            `;
-                        }).join('');
-                    }
-                } else {
-                    ticketList.innerHTML = '<div class="alert alert-danger">Error loading tickets</div>';
-                }
-            } catch (error) {
-                ticketList.innerHTML = `<div class="alert alert-danger">Error: ${error.message}</div>`;
-            }
-        }
-
-        // Delete ticket function
-        async function deleteTicket(ticketId) {
-            if (confirm(`Are you sure you want to delete ticket ${ticketId}?`)) {
-                try {
-                    const res = await fetch(`/tickets/${ticketId}`, {
-                        method: 'DELETE'
-                    });
-
-                    const data = await res.json();
-                    if (data.status === 'success') {
-                        alert(data.message);
-                        loadTickets();
-                        updateDashboardStats();
-                    } else {
-                        alert(`Error: ${data.message}`);
-                    }
-                } catch (error) {
-                    alert(`Error: ${error.message}`);
-                }
-            }
-        }
+# Create FastAPI app
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# Compresses ticket pages and static assets; the event stream and the
+# pre-compressed index page are passed through untouched
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
-        // Search tickets function
-        async function searchTickets() {
-            const query = document.getElementById('ticketSearch').value;
-            if (query.length < 2) {
-                alert('Search query must be at least 2 characters');
-                return;
-            }
+# Configure templates
+templates = Jinja2Templates(directory="templates")
 
-            const ticketList = document.getElementById('ticketList');
-            ticketList.innerHTML = '<div class="d-flex justify-content-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Searching...</span></div></div>';
-
-            try {
-                const res = await fetch(`/tickets/search?q=${encodeURIComponent(query)}`);
-                const data = await res.json();
-
-                if (data.status === 'success') {
-                    if (data.tickets.length === 0) {
-                        ticketList.innerHTML = "<p class='text-center text-muted'>No matching tickets found.</p>";
-                    } else {
-                        // Use the same rendering logic as loadTickets
-                        ticketList.innerHTML = data.tickets.map(ticket => {
-                            // Determine priority class
-                            let priorityClass = 'priority-medium';
-                            if (ticket.priority === 'P1') {
-                                priorityClass = 'priority-critical';
-                            } else if (ticket.priority === 'P2') {
-                                priorityClass = 'priority-high';
-                            } else if (ticket.priority === 'P4') {
-                                priorityClass = 'priority-low';
-                            }
+# Serve static files
+app.mount("/static", StaticFiles(directory="static"), name="static")
 
-                            // Format the date
-                            const createdDate = new Date(ticket.created_at);
-                            const formattedDate = createdDate.toLocaleString();
-
-                            // Format category for display
-                            const categoryDisplay = ticket.category ? ticket.category.replace('_', ' ').toUpperCase() : 'INCIDENT';
-
-                            // Format team for display
-                            const teamDisplay = ticket.assigned_team ? ticket.assigned_team.replace('_', ' ') : 'Auto Assigned';
-
-                            return `
-                                <div class="card mb-3">
-                                    <div class="card-body p-3">
-                                        <div class="d-flex justify-content-between align-items-center mb-2">
-                                            <span class="badge status-${ticket.status}">${ticket.status.toUpperCase()}</span>
-                                            <span class="badge ${priorityClass}">${ticket.priority || 'P3'}</span>
-                                        </div>
-                                        <h6 class="card-title">${ticket.issue.substring(0, 50)}${ticket.issue.length > 50 ? '...' : ''}</h6>
-                                        <div class="mt-2">
-                                            <small class="text-muted">Category: ${categoryDisplay}</small><br>
-                                            <small class="text-muted">Team: ${teamDisplay}</small>
-                                        </div>
-                                        <div class="d-flex justify-content-between align-items-center mt-3">
-                                            <small class="text-muted">${formattedDate}</small>
-                                            <button class="btn btn-sm btn-outline-danger" onclick="deleteTicket('${ticket.ticket_id}')">
-                                                <i class="bi bi-trash"></i>
-                                            </button>
-                                        </div>
-                                        ${ticket.auto_generated ? '<div class="mt-2"><span class="badge bg-info">Auto-generated</span></div>' : ''}
-                                    </div>
-                                </div>
-                            `;
-                        }).join('');
-                    }
-                } else {
-                    ticketList.innerHTML = '<div class="alert alert-danger">Error searching tickets</div>';
-                }
-            } catch (error) {
-                ticketList.innerHTML = `<div class="alert alert-danger">Error: ${error.message}</div>`;
-            }
-        }
+INDEX_HTML_PATH = os.path.join("static", "index.html")
 
-        // Update dashboard statistics
-        async function updateDashboardStats() {
-            try {
-                // Get all tickets to calculate stats
-                const res = await fetch('/tickets/list?limit=100');
-                const data = await res.json();
-
-                if (data.status === 'success') {
-                    const tickets = data.tickets;
-                    const openTickets = tickets.filter(t => t.status === 'open').length;
-                    const criticalTickets = tickets.filter(t => t.priority === 'P1').length;
-                    const autoGenerated = tickets.filter(t => t.auto_generated).length;
-
-                    document.getElementById('openTicketsCount').textContent = openTickets;
-                    document.getElementById('criticalCount').textContent = criticalTickets;
-                    document.getElementById('autoResolved').textContent = autoGenerated;
-                    document.getElementById('slaCompliance').textContent = '-';  // Placeholder
-                    document.getElementById('lastUpdated').textContent = new Date().toLocaleTimeString();
-                }
-            } catch (error) {
-                console.error('Error updating dashboard stats:', error);
-            }
-        }
+# The page is static, so it is read and gzip-compressed once at import
+# rather than on every request
+with open(INDEX_HTML_PATH, "rb") as f:
+    _INDEX_HTML: bytes = f.read()
+_INDEX_HTML_GZ: bytes = gzip.compress(_INDEX_HTML, 9)
+_INDEX_ETAG = '"' + hashlib.blake2b(_INDEX_HTML, digest_size=8).hexdigest() + '"'
+_INDEX_HEADERS = {
+    "Cache-Control": "public, max-age=60",
+    "ETag": _INDEX_ETAG,
+    "Vary": "Accept-Encoding",
+}
 
-        // Ticket polling function
-        function startTicketPolling() {
-            // Check for new tickets every 10 seconds
-            setInterval(loadTickets, 10000);
-            // Update dashboard stats every minute
-            setInterval(updateDashboardStats, 60000);
-        }
-    </script>
-</body>
-</html>
 
-    """
-    return HTMLResponse(content=html_content, status_code=200)
+@app.get("/")
+async def home(request: Request):
+    """Render home page"""
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=_INDEX_HTML_GZ,
+            media_type="text/html; charset=utf-8",
+            headers={**_INDEX_HEADERS, "Content-Encoding": "gzip"}
+        )
+    return Response(content=_INDEX_HTML, media_type="text/html; charset=utf-8", headers=_INDEX_HEADERS)
 
 
 @app.post("/vision")
-async def process_vision(image: UploadFile = File(...), prompt: str = Form("Describe this image")):
+async def process_vision(request: Request):
     """Process image with vision agent"""
+    check_rate_limit("vision", request.client.host if request.client else "unknown", VISION_RATE_LIMIT)
+
+    # Refuse from the headers alone, before any of the body is read; the
+    # form is parsed here rather than through File()/Form() parameters,
+    # which would have FastAPI spool the whole upload first
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
     try:
-        image_data = await image.read()
-        result = await vision_agent.process({
-            "image_data": image_data,
-            "prompt": prompt
-        })
-        return {"result": result}
-    except Exception as e:
-        return {"error": str(e)}
+        content_length = int(request.headers["content-length"])
+    except KeyError:
+        raise HTTPException(status_code=411, detail="Content-Length is required")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if content_length > VISION_MAX_BYTES + VISION_FORM_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"Image exceeds {VISION_MAX_BYTES // (1024 * 1024)} MiB limit")
+
+    async with request.form(max_files=1, max_fields=1) as form:
+        image = form.get("image")
+        prompt = form.get("prompt")
+        if not isinstance(prompt, str) or not prompt:
+            prompt = "Describe this image"
+        if image is None or isinstance(image, str):
+            raise HTTPException(status_code=422, detail="An image file is required")
+        if image.size is not None and image.size > VISION_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Image exceeds {VISION_MAX_BYTES // (1024 * 1024)} MiB limit")
+        if not (image.content_type or "").startswith("image/"):
+            raise HTTPException(status_code=415, detail="Upload must be an image")
+        try:
+            # Starlette has spooled the upload to a temporary file; it is
+            # read on the vision pool rather than here on the event loop
+            result = await vision_agent.process({
+                "image_file": image.file,
+                "prompt": prompt
+            })
+            return {"result": result}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/text")
 async def process_text(prompt: Dict[str, str] = Body(...), request: Request = None):
     """Process text with text agent and automatically create tickets if issues detected"""
+    client_ip = request.client.host if request else "unknown"
+    check_rate_limit("text", client_ip, TEXT_RATE_LIMIT)
     try:
-        client_ip = request.client.host if request else "unknown"
 
         result = await coordinator.process({
             "type": "text",
@@ -1257,7 +1320,7 @@ async def process_text(prompt: Dict[str, str] = Body(...), request: Request = No
 
         return result
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/ticket")
@@ -1276,7 +1339,7 @@ async def create_ticket(ticket_data: Dict[str, str] = Body(...), request: Reques
         })
         return {"result": result}
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/tickets/{ticket_id}")
@@ -1287,43 +1350,135 @@ async def delete_ticket(ticket_id: str):
             "action": "delete",
             "ticket_id": ticket_id
         })
-        if "deleted successfully" in response:
-            return {"status": "success", "message": response}
-        else:
-            return {"status": "error", "message": response}
     except Exception as e:
-        return {"status": "error", "error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if "deleted successfully" in response:
+        return {"status": "success", "message": response}
+    if response == "Ticket not found":
+        raise HTTPException(status_code=404, detail=response)
+    raise HTTPException(status_code=500, detail=response)
 
 
 @app.get("/tickets/search")
 async def search_tickets(q: str):
     """Search for tickets"""
-    try:
-        if not q or len(q) < 2:
-            return {"status": "error", "message": "Search query must be at least 2 characters"}
+    if not q or len(q) < 2:
+        raise HTTPException(status_code=400, detail="Search query must be at least 2 characters")
 
+    try:
         response = await ticket_agent.process({
             "action": "search",
             "query": q
         })
-        return {"status": "success", "tickets": json.loads(response)}
+        return ORJSONResponse({"status": "success", "tickets": response})
     except Exception as e:
-        return {"status": "error", "error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def tickets_etag(version: int, *parts: Any) -> str:
+    """ETag for a ticket view, derived from the ticket version it was read at and the view's parameters"""
+    key = ":".join(map(str, (version, *parts)))
+    return '"' + hashlib.blake2b(key.encode(), digest_size=8).hexdigest() + '"'
+
+
+# Browsers may keep ticket views but must revalidate them on every use
+TICKET_VIEW_CACHE_CONTROL = "no-cache"
 
 
 @app.get("/tickets/list")
-async def paginated_tickets(limit: int = 10, offset: int = 0):
-    """List tickets with pagination"""
+async def paginated_tickets(request: Request, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+                            offset: int = Query(0, ge=0), before: Optional[str] = None):
+    """List tickets with pagination, by offset or after a previous page's next_cursor"""
     try:
-        response = await ticket_agent.process({
+        # Let clients that already hold this page skip the body entirely
+        version = await ticket_agent.process({"action": "version"})
+        etag = tickets_etag(version, limit, offset, before)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": TICKET_VIEW_CACHE_CONTROL})
+
+        page = await ticket_agent.process({
             "action": "list",
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "before": before,
+            "version": version
         })
-        return {"status": "success", "tickets": json.loads(response)}
+        # Tagged with the version the page was actually read at, which is
+        # newer than `version` if tickets changed in between
+        headers = {"ETag": tickets_etag(page["version"], limit, offset, before), "Cache-Control": TICKET_VIEW_CACHE_CONTROL}
+        tickets = page["tickets"]
+        if len(tickets) == limit:
+            last = tickets[-1]
+            next_cursor = last["created_at"] + CURSOR_SEPARATOR + last["ticket_id"]
+        else:
+            next_cursor = None
+        return ORJSONResponse(
+            {"status": "success", "tickets": tickets, "next_cursor": next_cursor},
+            headers=headers
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/tickets/stats")
+async def ticket_stats():
+    """Dashboard ticket counts"""
+    try:
+        counts = await ticket_agent.process({"action": "stats"})
+        return {"status": "success", **counts}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/tickets/dashboard")
+async def ticket_dashboard(request: Request, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE)):
+    """Recent tickets and dashboard counts in a single response"""
+    try:
+        version = await ticket_agent.process({"action": "version"})
+        etag = tickets_etag(version, "dashboard", limit)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": TICKET_VIEW_CACHE_CONTROL})
+
+        # Tickets and counts come from one snapshot, tagged with its version
+        view = await ticket_agent.process({"action": "dashboard", "limit": limit, "version": version})
+        headers = {"ETag": tickets_etag(view["version"], "dashboard", limit), "Cache-Control": TICKET_VIEW_CACHE_CONTROL}
+        return ORJSONResponse({"status": "success", "tickets": view["tickets"], "stats": view["stats"]}, headers=headers)
     except Exception as e:
-        return {"status": "error", "error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/tickets/stream")
+async def ticket_stream(request: Request):
+    """Push a Server-Sent Event whenever tickets are created or deleted"""
+
+    async def event_stream():
+        # Subscribed inside the generator so the finally below always pairs
+        # with it, even if the client is gone before the first event
+        queue = ticket_agent.subscribe()
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"data: " + _dumps(message) + b"\n\n"
+        finally:
+            ticket_agent.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # "auto" picks uvloop's libuv-based event loop and the httptools C
+    # parser when they are installed, and falls back to asyncio and h11 on
+    # platforms without them (uvloop has no Windows build)
+    # Multiple workers need an import string so each process can load the app
+    uvicorn.run(app if WORKERS == 1 else "multi_agent_system:app",
+                host="0.0.0.0", port=8000, loop="auto", http="auto", workers=WORKERS)
\ No newline at end of file